@@ -62,15 +62,33 @@ st.markdown("""
 def get_available_models():
     return ["llava:7b", "llama3.2-vision:11b"]
 
-def process_single_image(processor, image_path, format_type, enable_preprocessing):
-    """Process a single image and return the result"""
+@st.cache_resource
+def get_processor(model_name, max_workers):
+    """Create one OCR processor per settings, reused across Streamlit reruns"""
+    return OCRProcessor(model_name=model_name, max_workers=max_workers)
+
+@st.cache_data(show_spinner=False)
+def run_ocr(_processor, image_bytes, model_name, format_type, enable_preprocessing):
+    """
+    OCR a single image, memoized on its bytes, model and options so reruns
+    skip the call entirely (the processor itself is not part of the key)
+    """
+    result = _processor.process_image(
+        image_path=image_bytes,
+        format_type=format_type,
+        preprocess=enable_preprocessing
+    )
+    if result.startswith("Error processing image:"):
+        # Raising keeps failures (e.g. Ollama unreachable) out of the cache
+        raise RuntimeError(result)
+    return result
+
+def process_single_image(processor, image_bytes, format_type, enable_preprocessing):
+    """Process a single uploaded image and return the result"""
     try:
-        result = processor.process_image(
-            image_path=image_path,
-            format_type=format_type,
-            preprocess=enable_preprocessing
-        )
-        return result
+        return run_ocr(processor, image_bytes, processor.model_name, format_type, enable_preprocessing)
+    except RuntimeError as e:
+        return str(e)
     except Exception as e:
         return f"Error processing image: {str(e)}"
 
@@ -129,7 +147,7 @@ def main():
             st.info("Llama 3.2 Vision: Advanced model with high accuracy for complex text extraction")
 
     # Initialize OCR Processor
-    processor = OCRProcessor(model_name=selected_model, max_workers=max_workers)
+    processor = get_processor(selected_model, max_workers)
 
     # Main content area with tabs
     tab1, tab2 = st.tabs(["📸 Image Processing", "ℹ️ About"])
@@ -144,86 +162,83 @@ def main():
         )
 
         if uploaded_files:
-            # Create a temporary directory for uploaded files
-            with tempfile.TemporaryDirectory() as temp_dir:
-                image_paths = []
-                
-                # Save uploaded files and collect paths
-                for uploaded_file in uploaded_files:
-                    temp_path = os.path.join(temp_dir, uploaded_file.name)
-                    with open(temp_path, "wb") as f:
-                        f.write(uploaded_file.getvalue())
-                    image_paths.append(temp_path)
-
-                # Display images in a gallery
-                st.subheader(f"📸 Input Images ({len(uploaded_files)} files)")
-                cols = st.columns(min(len(uploaded_files), 4))
-                for idx, uploaded_file in enumerate(uploaded_files):
-                    with cols[idx % 4]:
-                        image = Image.open(uploaded_file)
-                        st.image(image, use_container_width=True, caption=uploaded_file.name)
-
-                # Process button
-                if st.button("🚀 Process Images"):
-                    with st.spinner("Processing images..."):
-                        if len(image_paths) == 1:
-                            # Single image processing
-                            result = process_single_image(
-                                processor, 
-                                image_paths[0], 
-                                format_type,
-                                enable_preprocessing
-                            )
-                            st.subheader("📝 Extracted Text")
-                            st.markdown(result)
-                            
-                            # Download button for single result
-                            st.download_button(
-                                "📥 Download Result",
-                                result,
-                                file_name=f"ocr_result.{format_type}",
-                                mime="text/plain"
-                            )
-                        else:
-                            # Batch processing
+            # Display images in a gallery
+            st.subheader(f"📸 Input Images ({len(uploaded_files)} files)")
+            cols = st.columns(min(len(uploaded_files), 4))
+            for idx, uploaded_file in enumerate(uploaded_files):
+                with cols[idx % 4]:
+                    image = Image.open(uploaded_file)
+                    st.image(image, use_container_width=True, caption=uploaded_file.name)
+
+            # Process button
+            if st.button("🚀 Process Images"):
+                with st.spinner("Processing images..."):
+                    if len(uploaded_files) == 1:
+                        # Single image processing, straight from the uploaded bytes
+                        result = process_single_image(
+                            processor, 
+                            uploaded_files[0].getvalue(), 
+                            format_type,
+                            enable_preprocessing
+                        )
+                        st.subheader("📝 Extracted Text")
+                        st.markdown(result)
+                        
+                        # Download button for single result
+                        st.download_button(
+                            "📥 Download Result",
+                            result,
+                            file_name=f"ocr_result.{format_type}",
+                            mime="text/plain"
+                        )
+                    else:
+                        # Batch processing works on paths, so save the uploads to a temporary directory
+                        with tempfile.TemporaryDirectory() as temp_dir:
+                            image_paths = []
+                            for uploaded_file in uploaded_files:
+                                temp_path = os.path.join(temp_dir, uploaded_file.name)
+                                with open(temp_path, "wb") as f:
+                                    f.write(uploaded_file.getvalue())
+                                image_paths.append(temp_path)
+
                             results = process_batch_images(
                                 processor,
                                 image_paths,
                                 format_type,
                                 enable_preprocessing
                             )
-                            
-                            # Display statistics
-                            st.subheader("📊 Processing Statistics")
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric("Total Images", results['statistics']['total'])
-                            with col2:
-                                st.metric("Successful", results['statistics']['successful'])
-                            with col3:
-                                st.metric("Failed", results['statistics']['failed'])
-
-                            # Display results
-                            st.subheader("📝 Extracted Text")
-                            for file_path, text in results['results'].items():
-                                with st.expander(f"Result: {os.path.basename(file_path)}"):
-                                    st.markdown(text)
-
-                            # Display errors if any
-                            if results['errors']:
-                                st.error("⚠️ Some files had errors:")
-                                for file_path, error in results['errors'].items():
-                                    st.warning(f"{os.path.basename(file_path)}: {error}")
-
-                            # Download all results as JSON
-                            if st.button("📥 Download All Results"):
-                                json_results = json.dumps(results, indent=2)
-                                st.download_button(
-                                    "📥 Download Results JSON",
-                                    json_results,
-                                    file_name="ocr_results.json",
-                                    mime="application/json"
-                                )
+                        
+                        # Display statistics
+                        st.subheader("📊 Processing Statistics")
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.metric("Total Images", results['statistics']['total'])
+                        with col2:
+                            st.metric("Successful", results['statistics']['successful'])
+                        with col3:
+                            st.metric("Failed", results['statistics']['failed'])
+
+                        # Display results
+                        st.subheader("📝 Extracted Text")
+                        for file_path, text in results['results'].items():
+                            with st.expander(f"Result: {os.path.basename(file_path)}"):
+                                st.markdown(text)
+
+                        # Display errors if any
+                        if results['errors']:
+                            st.error("⚠️ Some files had errors:")
+                            for file_path, error in results['errors'].items():
+                                st.warning(f"{os.path.basename(file_path)}: {error}")
+
+                        # Download all results as JSON
+                        if st.button("📥 Download All Results"):
+                            json_results = json.dumps(results, indent=2)
+                            st.download_button(
+                                "📥 Download Results JSON",
+                                json_results,
+                                file_name="ocr_results.json",
+                                mime="application/json"
+                            )
 
     with tab2:
         st.header("About Vision OCR Lab")
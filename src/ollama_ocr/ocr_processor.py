@@ -1,154 +1,556 @@
+import asyncio
 import json
-from typing import Dict, Any, List, Union
+from collections import Counter
+from typing import Dict, Any, List, Optional, Union
 import os
-import base64
+import hashlib
+import mmap
+import sqlite3
+import threading
+import httpx
 import requests
-from tqdm import tqdm
+from requests.adapters import HTTPAdapter
+from tqdm.asyncio import tqdm as atqdm
 import concurrent.futures
 from pathlib import Path
 import cv2
-from pdf2image import convert_from_path
+import numpy as np
+from pdf2image import convert_from_bytes, convert_from_path
+from PIL import Image
+
+try:
+    # SIMD-accelerated drop-in replacement for the stdlib encoder
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if __package__:
+    from .preproc import allocate_buffers, clahe_denoise
+else:
+    # Imported as a top-level module, e.g. by `streamlit run app.py`
+    from preproc import allocate_buffers, clahe_denoise
 
 # 从环境变量中读取 base_url，如果没有设置则使用默认值
 base_url: str = os.getenv("BASE_URL", "http://localhost:11434/api/generate")
+# 缓存数据库路径，同样可以通过环境变量覆盖
+cache_path: str = os.getenv("OCR_CACHE_PATH", "ocr_cache.sqlite")
+
+# OpenCV 的 CUDA 模块仅在 CUDA 版本的构建中可用，并且需要有可用的 GPU；
+# 部分构建不包含 CLAHE 或 photo 模块，因此还要检查实际用到的函数
+try:
+    _CUDA_AVAILABLE = (
+        cv2.cuda.getCudaEnabledDeviceCount() > 0
+        and hasattr(cv2, "cuda_GpuMat")
+        and all(hasattr(cv2.cuda, name) for name in ("createCLAHE", "fastNlMeansDenoising"))
+    )
+except (AttributeError, cv2.error):
+    _CUDA_AVAILABLE = False
+
+# resp 缓存中 preprocess 列的取值：记录实际使用的预处理路径，
+# 因为 GPU（非局部均值去噪）和 CPU（高斯去噪）会得到不同的模型输入
+_PREPROCESS_NONE = 0
+_PREPROCESS_CPU = 1
+_PREPROCESS_GPU = 2
+
+# 图像来源：文件路径，或者文件的原始字节
+ImageSource = Union[str, bytes, bytearray]
+
+# Generic prompt templates for different formats
+_PROMPTS: Dict[str, str] = {
+    "markdown": """Please look at this image and extract all the text content. Format the output in markdown:
+                - Use headers (# ## ###) for titles and sections
+                - Use bullet points (-) for lists
+                - Use proper markdown formatting for emphasis and structure
+                - Preserve the original text hierarchy and formatting as much as possible""",
+
+    "text": """Please look at this image and extract all the text content. 
+                Provide the output as plain text, maintaining the original layout and line breaks where appropriate.
+                Include all visible text from the image.""",
+
+    "json": """Please look at this image and extract all the text content. Structure the output as JSON with these guidelines:
+                - Identify different sections or components
+                - Use appropriate keys for different text elements
+                - Maintain the hierarchical structure of the content
+                - Include all visible text from the image""",
+
+    "structured": """Please look at this image and extract all the text content, focusing on structural elements:
+                - Identify and format any tables
+                - Extract lists and maintain their structure
+                - Preserve any hierarchical relationships
+                - Format sections and subsections clearly""",
+
+    "key_value": """Please look at this image and extract text that appears in key-value pairs:
+                - Look for labels and their associated values
+                - Extract form fields and their contents
+                - Identify any paired information
+                - Present each pair on a new line as 'key: value'"""
+}
+
+def _cuda_preprocess(gray: np.ndarray) -> np.ndarray:
+    """CLAHE and non-local means denoise of a grayscale image on the GPU"""
+    gpu_gray = cv2.cuda_GpuMat()
+    gpu_gray.upload(gray)
+    clahe = cv2.cuda.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    enhanced = clahe.apply(gpu_gray, cv2.cuda_Stream.Null())
+    # Same filter strength as the cv2.fastNlMeansDenoising default
+    return cv2.cuda.fastNlMeansDenoising(enhanced, 3.0).download()
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a request payload to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+def _format_json(text: str) -> str:
+    """Pretty-print text as JSON if it parses, otherwise return it unchanged"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(orjson.loads(text), option=orjson.OPT_INDENT_2).decode("utf-8")
+        except orjson.JSONDecodeError:
+            return text
+    try:
+        return json.dumps(json.loads(text), indent=2)
+    except json.JSONDecodeError:
+        return text
+
+def _run_coroutine(coro):
+    """Run a coroutine to completion, even when called from a running event loop (e.g. Jupyter)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
 
 class OCRProcessor:
+    __slots__ = (
+        "model_name", "base_url", "max_workers", "enable_cache",
+        "keep_alive", "use_gpu", "session", "_cache", "_cache_lock",
+    )
+
     def __init__(self, model_name: str = "llama3.2-vision:11b", 
                  base_url: str = base_url,
-                 max_workers: int = 1):
+                 max_workers: int = 1,
+                 enable_cache: bool = True,
+                 cache_path: str = cache_path,
+                 keep_alive: Union[int, str, None] = None,
+                 warm_up: bool = False,
+                 use_gpu: bool = True):
         
         self.model_name = model_name
         self.base_url = base_url
         self.max_workers = max_workers
+        self.enable_cache = enable_cache
+        # How long Ollama keeps the model loaded after a request (None = server default)
+        self.keep_alive = keep_alive
+        # Only use the GPU when OpenCV was built with CUDA and a device is present
+        self.use_gpu = use_gpu and _CUDA_AVAILABLE
+
+        # Persistent session so keep-alive connections to Ollama are reused
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers * 2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Content-hash keyed cache of model responses
+        self._cache = None
+        self._cache_lock = threading.Lock()
+        if enable_cache:
+            try:
+                self._cache = sqlite3.connect(cache_path, check_same_thread=False)
+                with self._cache:
+                    self._cache.execute(
+                        "CREATE TABLE IF NOT EXISTS resp ("
+                        "hash TEXT, fmt TEXT, model TEXT, preprocess INTEGER, text TEXT, "
+                        "PRIMARY KEY (hash, fmt, model, preprocess))"
+                    )
+            except sqlite3.Error:
+                # The cache is only an optimization, run without it (e.g. read-only directory)
+                self._cache = None
+
+        if warm_up:
+            self._load_model()
+
+    def _load_model(self) -> None:
+        """Preload the model, so the first real request doesn't pay for loading it"""
+        # An empty prompt only loads the model (Ollama's documented preload request)
+        payload = {"model": self.model_name, "prompt": ""}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        try:
+            self.session.post(
+                self.base_url,
+                data=_dumps(payload),
+                headers={"Content-Type": "application/json"},
+                timeout=600
+            )
+        except requests.RequestException:
+            # Warm-up is best effort, real requests will surface any error
+            pass
 
-    def _encode_image(self, image_path: str) -> str:
-        """Convert image to base64 string"""
+    @staticmethod
+    def _hash_bytes(buf: bytes) -> str:
+        """Return the BLAKE2b content hash used as cache key"""
+        return hashlib.blake2b(buf, digest_size=16).hexdigest()
+
+    def _content_hash(self, image_path: ImageSource) -> str:
+        """Hash in-memory image bytes, or the contents of a file without reading it into memory"""
+        if isinstance(image_path, (bytes, bytearray)):
+            return self._hash_bytes(image_path)
         with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode("utf-8")
+            if hasattr(hashlib, "file_digest"):  # Python 3.11+
+                return hashlib.file_digest(
+                    image_file, lambda: hashlib.blake2b(digest_size=16)
+                ).hexdigest()
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return self._hash_bytes(buf)
+
+    def _cache_get(self, query: str, params: tuple):
+        """Run a lookup against the cache, returning the first column or None"""
+        try:
+            with self._cache_lock:
+                row = self._cache.execute(query, params).fetchone()
+        except sqlite3.Error:
+            # e.g. another process holds the database lock; treat it as a miss
+            return None
+        return row[0] if row else None
+
+    def _cache_put(self, query: str, params: tuple) -> None:
+        """Write an entry to the cache, skipping it if the database can't be written"""
+        try:
+            with self._cache_lock, self._cache:
+                self._cache.execute(query, params)
+        except sqlite3.Error:
+            pass
+
+    def _encode_image(self, image_path: ImageSource) -> str:
+        """
+        Convert image to base64 string
 
-    def _preprocess_image(self, image_path: str) -> str:
+        Args:
+            image_path: Path to the image file, or its raw bytes
+        """
+        if isinstance(image_path, (bytes, bytearray)):
+            return base64.b64encode(image_path).decode("utf-8")
+
+        # Map the file instead of reading it, so the raw bytes are never
+        # copied into a Python object before encoding
+        with open(image_path, "rb") as image_file, \
+                mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return base64.b64encode(buf).decode("utf-8")
+
+    def _encode_array(self, image: np.ndarray) -> str:
+        """Encode an image array as a compact grayscale JPEG and convert it to base64 string"""
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        # The vision encoder downsamples anyway; clamp the long side to its typical input size
+        scale = 1568 / max(image.shape[:2])
+        if scale < 1:
+            size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+        ok, buf = cv2.imencode(
+            ".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 70, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        )
+        if not ok:
+            raise ValueError("Could not encode preprocessed image")
+        return base64.b64encode(buf).decode("utf-8")
+
+    @staticmethod
+    def _thread_buffers(buf_shape: Optional[tuple], buf_local: Optional[threading.local]) -> Optional[Dict[str, np.ndarray]]:
+        """Return this thread's preallocated preprocessing buffers for a batch, if it set a shape"""
+        if buf_shape is None or buf_local is None:
+            return None
+        bufs = getattr(buf_local, "bufs", None)
+        if bufs is None:
+            bufs = buf_local.bufs = allocate_buffers(buf_shape)
+        return bufs
+
+    @staticmethod
+    def _modal_shape(image_paths: List[Path], sample: int = 8) -> Optional[tuple]:
+        """Most common (height, width) among the first few images, read from headers only"""
+        shapes = []
+        for path in image_paths[:sample]:
+            if path.suffix.lower() == '.pdf':
+                continue
+            try:
+                with Image.open(path) as image:
+                    shape = (image.height, image.width)
+                    # cv2.imdecode applies the EXIF orientation, and orientations 5-8 swap the axes
+                    if image.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                        shape = shape[::-1]
+                    shapes.append(shape)
+            except (OSError, ValueError):
+                continue
+        if not shapes:
+            return None
+        return Counter(shapes).most_common(1)[0][0]
+
+    @staticmethod
+    def _read_img(image_path: ImageSource) -> Optional[np.ndarray]:
+        """Decode an image from bytes or a memory-mapped file, returning None if it can't be decoded"""
+        if isinstance(image_path, (bytes, bytearray)):
+            if not image_path:
+                return None
+            return cv2.imdecode(np.frombuffer(image_path, np.uint8), cv2.IMREAD_COLOR)
+        with open(image_path, "rb") as image_file:
+            if os.fstat(image_file.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                data = np.frombuffer(buf, np.uint8)
+                image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+                # The mmap can't be closed while an array still points into it
+                del data
+        return image
+
+    def _preprocess_mode(self, preprocess: bool) -> int:
+        """Which preprocessing path a request goes through, part of the response cache key"""
+        if not preprocess:
+            return _PREPROCESS_NONE
+        return _PREPROCESS_GPU if self.use_gpu else _PREPROCESS_CPU
+
+    @staticmethod
+    def _is_clean(gray: np.ndarray) -> bool:
+        """Whether a grayscale image is already well exposed and sharp"""
+        # Judge a small copy, so the check doesn't allocate a full-size float Laplacian
+        scale = 1024 / max(gray.shape)
+        if scale < 1:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        _, std = cv2.meanStdDev(gray)
+        _, lap_std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_32F))
+        return std[0, 0] > 60 and lap_std[0, 0] ** 2 > 100
+
+    def _preprocess_image(self, image_path: ImageSource, bufs: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
         """
         Preprocess image before OCR:
         - Convert PDF to image if needed
         - Auto-rotate
+        - Convert to grayscale; stop here if the image is already clean
         - Enhance contrast
         - Reduce noise
+
+        Args:
+            image_path: Path to the image file, or its raw bytes
+            bufs: Buffers from allocate_buffers; only used if they match the image size
         """
+        is_bytes = isinstance(image_path, (bytes, bytearray))
+
         # Handle PDF files
-        if image_path.lower().endswith('.pdf'):
-            pages = convert_from_path(image_path)
+        if image_path.startswith(b'%PDF') if is_bytes else image_path.lower().endswith('.pdf'):
+            # Only the first page is used, so only render the first page
+            convert = convert_from_bytes if is_bytes else convert_from_path
+            pages = convert(image_path, dpi=150, first_page=1, last_page=1)
             if not pages:
                 raise ValueError("Could not convert PDF to image")
-            # Save first page as temporary image
-            temp_path = f"{image_path}_temp.jpg"
-            pages[0].save(temp_path, 'JPEG')
-            image_path = temp_path
-
-        # Read image
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Could not read image at {image_path}")
+            # PIL gives RGB, the rest of the pipeline expects BGR like cv2.imread
+            image = np.asarray(pages[0].convert("RGB"))[:, :, ::-1]
+        else:
+            # Read image
+            image = self._read_img(image_path)
+            if image is None:
+                if is_bytes:
+                    raise ValueError("Could not decode image data")
+                raise ValueError(f"Could not read image at {image_path}")
 
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if bufs is not None and bufs["out"].shape != image.shape[:2]:
+            bufs = None
 
-        # Enhance contrast using CLAHE
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
+        # Clean scans and rendered PDFs gain nothing from enhancement
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=None if bufs is None else bufs["gray"])
+        if self._is_clean(gray):
+            return gray
 
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(enhanced)
+        denoised = None
+        if self.use_gpu:
+            try:
+                denoised = _cuda_preprocess(gray)
+            except cv2.error:
+                # The CUDA build can't run this pipeline, use the CPU from now on
+                self.use_gpu = False
+        if denoised is None:
+            # Enhance contrast (CLAHE) and denoise
+            out = np.empty(gray.shape, np.uint8) if bufs is None else bufs["out"]
+            denoised = clahe_denoise(gray, out, 2.0, (8,8))
 
         # Auto-rotate if needed
         # TODO: Implement rotation detection and correction
 
-        # Save preprocessed image
-        preprocessed_path = f"{image_path}_preprocessed.jpg"
-        cv2.imwrite(preprocessed_path, denoised)
+        return denoised
 
-        return preprocessed_path
-
-    def process_image(self, image_path: str, format_type: str = "markdown", preprocess: bool = True) -> str:
+    def _build_request(self, image_path: ImageSource, format_type: str, preprocess: bool,
+                       buf_shape: Optional[tuple] = None, buf_local: Optional[threading.local] = None):
         """
-        Process an image and extract text in the specified format
-        
+        Check the response cache and, on a miss, build the request body
+
         Args:
-            image_path: Path to the image file
-            format_type: One of ["markdown", "text", "json", "structured", "key_value"]
-            preprocess: Whether to apply image preprocessing
+            buf_shape: Image shape a batch preallocated preprocessing buffers for
+            buf_local: The batch's per-thread buffer storage
+
+        Returns:
+            Tuple of (cache key, cached response or None, serialized payload or None)
         """
-        try:
-            if preprocess:
-                image_path = self._preprocess_image(image_path)
-            
+        key = None
+        if self._cache is not None:
+            key = self._content_hash(image_path)
+            cached = self._cache_get(
+                "SELECT text FROM resp WHERE hash=? AND fmt=? AND model=? AND preprocess=?",
+                (key, format_type, self.model_name, self._preprocess_mode(preprocess))
+            )
+            if cached is not None:
+                return key, cached, None
+
+        if preprocess:
+            image_base64 = self._encode_array(
+                self._preprocess_image(image_path, self._thread_buffers(buf_shape, buf_local))
+            )
+        else:
             image_base64 = self._encode_image(image_path)
-            
-            # Clean up temporary files
-            if image_path.endswith(('_preprocessed.jpg', '_temp.jpg')):
-                os.remove(image_path)
 
-            # Generic prompt templates for different formats
-            prompts = {
-                "markdown": """Please look at this image and extract all the text content. Format the output in markdown:
-                - Use headers (# ## ###) for titles and sections
-                - Use bullet points (-) for lists
-                - Use proper markdown formatting for emphasis and structure
-                - Preserve the original text hierarchy and formatting as much as possible""",
+        # Get the appropriate prompt
+        prompt = _PROMPTS.get(format_type, _PROMPTS["text"])
 
-                "text": """Please look at this image and extract all the text content. 
-                Provide the output as plain text, maintaining the original layout and line breaks where appropriate.
-                Include all visible text from the image.""",
+        # Prepare the request payload
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": False,
+            "images": [image_base64]
+        }
+        del image_base64
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
 
-                "json": """Please look at this image and extract all the text content. Structure the output as JSON with these guidelines:
-                - Identify different sections or components
-                - Use appropriate keys for different text elements
-                - Maintain the hierarchical structure of the content
-                - Include all visible text from the image""",
+        return key, None, _dumps(payload)
 
-                "structured": """Please look at this image and extract all the text content, focusing on structural elements:
-                - Identify and format any tables
-                - Extract lists and maintain their structure
-                - Preserve any hierarchical relationships
-                - Format sections and subsections clearly""",
+    def _handle_response(self, result: str, key: str, format_type: str, preprocess: bool) -> str:
+        """Clean up the model output and store it in the response cache"""
+        if format_type == "json":
+            # Re-format JSON if it's valid, otherwise keep the raw result
+            result = _format_json(result)
 
-                "key_value": """Please look at this image and extract text that appears in key-value pairs:
-                - Look for labels and their associated values
-                - Extract form fields and their contents
-                - Identify any paired information
-                - Present each pair on a new line as 'key: value'"""
-            }
+        if self._cache is not None:
+            self._cache_put(
+                "INSERT OR REPLACE INTO resp (hash, fmt, model, preprocess, text) VALUES (?, ?, ?, ?, ?)",
+                (key, format_type, self.model_name, self._preprocess_mode(preprocess), result)
+            )
 
-            # Get the appropriate prompt
-            prompt = prompts.get(format_type, prompts["text"])
+        return result
 
-            # Prepare the request payload
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "images": [image_base64]
-            }
+    def process_image(self, image_path: ImageSource, format_type: str = "markdown", preprocess: bool = True) -> str:
+        """
+        Process an image and extract text in the specified format
+        
+        Args:
+            image_path: Path to the image file, or its raw bytes (e.g. an upload)
+            format_type: One of ["markdown", "text", "json", "structured", "key_value"]
+            preprocess: Whether to apply image preprocessing
+        """
+        try:
+            key, cached, body = self._build_request(image_path, format_type, preprocess)
+            if cached is not None:
+                return cached
 
             # Make the API call to Ollama
-            response = requests.post(self.base_url, json=payload)
+            response = self.session.post(
+                self.base_url,
+                data=body,
+                headers={"Content-Type": "application/json"},
+                timeout=600
+            )
             response.raise_for_status()  # Raise an exception for bad status codes
             
             result = response.json().get("response", "")
-            
-            # Clean up the result if needed
-            if format_type == "json":
-                try:
-                    # Try to parse and re-format JSON if it's valid
-                    json_data = json.loads(result)
-                    return json.dumps(json_data, indent=2)
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, return the raw result
-                    return result
-            
-            return result
+            return self._handle_response(result, key, format_type, preprocess)
         except Exception as e:
             return f"Error processing image: {str(e)}"
 
+    async def _asend(self, client: httpx.AsyncClient, key: str, body: bytes, format_type: str, preprocess: bool) -> str:
+        """Send a prepared request to Ollama, the async counterpart of process_image's API call"""
+        response = await client.post(
+            self.base_url,
+            content=body,
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+
+        result = response.json().get("response", "")
+        # The cache write blocks on the lock the producers hold, keep it off the event loop
+        return await asyncio.to_thread(self._handle_response, result, key, format_type, preprocess)
+
+    async def _aprocess_batch(self, image_paths: List[Path], format_type: str, preprocess: bool,
+                              buf_shape: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        Two-stage pipeline: preprocessing workers build requests into a bounded
+        queue while max_workers inference workers drain it, so CPU
+        preprocessing overlaps with the Ollama calls. Failures are reported
+        in "errors" rather than "results".
+        """
+        queue = asyncio.Queue(maxsize=2 * self.max_workers)
+        pending = iter(image_paths)
+        results = {}
+        errors = {}
+        # Buffers belong to this batch, so concurrent batches on a shared processor don't collide
+        buf_local = threading.local()
+
+        async def produce():
+            for path in pending:
+                try:
+                    # Preprocessing and encoding are CPU/disk bound, keep them off the event loop
+                    request = await asyncio.to_thread(
+                        self._build_request, str(path), format_type, preprocess, buf_shape, buf_local
+                    )
+                except Exception as e:
+                    request = e
+                await queue.put((path, request))
+
+        async def consume(client: httpx.AsyncClient, pbar):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                path, request = item
+                if isinstance(request, Exception):
+                    errors[str(path)] = str(request)
+                else:
+                    key, cached, body = request
+                    if cached is not None:
+                        results[str(path)] = cached
+                    else:
+                        try:
+                            results[str(path)] = await self._asend(client, key, body, format_type, preprocess)
+                        except Exception as e:
+                            errors[str(path)] = str(e)
+                pbar.update(1)
+
+        limits = httpx.Limits(max_connections=self.max_workers)
+        async with httpx.AsyncClient(limits=limits, timeout=600) as client:
+            with atqdm(total=len(image_paths), desc="Processing images") as pbar:
+                consumers = [
+                    asyncio.create_task(consume(client, pbar))
+                    for _ in range(self.max_workers)
+                ]
+                # Each blocked producer holds a serialized body, so keep their number
+                # bounded; OpenCV releases the GIL, so there's no point exceeding the core count
+                n_producers = min(os.cpu_count() or 1, 2 * self.max_workers)
+                try:
+                    await asyncio.gather(*(produce() for _ in range(n_producers)))
+                    # One sentinel per inference worker
+                    for _ in consumers:
+                        await queue.put(None)
+                    await asyncio.gather(*consumers)
+                except BaseException:
+                    for task in consumers:
+                        task.cancel()
+                    raise
+
+        return {"results": results, "errors": errors}
+
     def process_batch(
         self,
         input_path: Union[str, List[str]],
@@ -181,24 +583,15 @@ class OCRProcessor:
         else:
             image_paths = [Path(p) for p in input_path]
 
-        results = {}
-        errors = {}
-        
-        # Process images in parallel with progress bar
-        with tqdm(total=len(image_paths), desc="Processing images") as pbar:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_path = {
-                    executor.submit(self.process_image, str(path), format_type, preprocess): path
-                    for path in image_paths
-                }
-                
-                for future in concurrent.futures.as_completed(future_to_path):
-                    path = future_to_path[future]
-                    try:
-                        results[str(path)] = future.result()
-                    except Exception as e:
-                        errors[str(path)] = str(e)
-                    pbar.update(1)
+        # Allocate preprocessing buffers once for the most common image size
+        buf_shape = None
+        if preprocess and not self.use_gpu:
+            buf_shape = self._modal_shape(image_paths)
+
+        # Process images concurrently with progress bar
+        outcome = _run_coroutine(self._aprocess_batch(image_paths, format_type, preprocess, buf_shape))
+        results = outcome["results"]
+        errors = outcome["errors"]
 
         return {
             "results": results,
@@ -0,0 +1,28 @@
+"""Image preprocessing into preallocated buffers."""
+import cv2
+import numpy as np
+
+
+def allocate_buffers(shape: tuple) -> dict:
+    """Allocate the grayscale and output buffers preprocessing needs for an (H, W) image"""
+    return {
+        "gray": np.empty(shape, np.uint8),
+        "out": np.empty(shape, np.uint8),
+    }
+
+
+def clahe_denoise(gray: np.ndarray, out: np.ndarray, clip: float = 2.0, tiles: tuple = (8, 8)) -> np.ndarray:
+    """
+    Contrast-enhance (CLAHE) and denoise a grayscale image
+
+    Args:
+        gray: Input image of shape (H, W), uint8
+        out: Preallocated uint8 output of shape (H, W)
+        clip: CLAHE clip limit, relative to the mean histogram bin
+        tiles: CLAHE tile grid as (rows, columns)
+    """
+    tiles_y, tiles_x = tiles
+    cv2.createCLAHE(clipLimit=clip, tileGridSize=(tiles_x, tiles_y)).apply(gray, dst=out)
+    # Filtering in place is supported, so no intermediate image is needed
+    cv2.GaussianBlur(out, (5, 5), 0, dst=out, borderType=cv2.BORDER_REPLICATE)
+    return out
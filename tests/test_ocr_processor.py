@@ -0,0 +1,144 @@
+import base64
+import json
+import os
+import sqlite3
+import sys
+
+import cv2
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ollama_ocr import ocr_processor  # noqa: E402
+from ollama_ocr.ocr_processor import OCRProcessor  # noqa: E402
+from ollama_ocr.preproc import clahe_denoise  # noqa: E402
+
+
+def _write_png(path, seed):
+    rng = np.random.default_rng(seed)
+    cv2.imwrite(str(path), rng.integers(0, 256, (32, 48, 3), dtype=np.uint8))
+    return path
+
+
+def test_process_batch_splits_results_and_errors(tmp_path, monkeypatch):
+    good = _write_png(tmp_path / "good.png", 0)
+    failing = _write_png(tmp_path / "failing.png", 1)
+    bad = tmp_path / "bad.png"
+    bad.write_bytes(b"not an image")
+    missing = tmp_path / "missing.png"
+    failing_b64 = base64.b64encode(failing.read_bytes()).decode("utf-8")
+
+    def handler(request):
+        image = json.loads(request.content)["images"][0]
+        if image == failing_b64:
+            return httpx.Response(500, json={"error": "boom"})
+        return httpx.Response(200, json={"response": "hello"})
+
+    client = httpx.AsyncClient
+    monkeypatch.setattr(
+        ocr_processor.httpx, "AsyncClient",
+        lambda **kwargs: client(transport=httpx.MockTransport(handler), **kwargs)
+    )
+
+    ocr = OCRProcessor(enable_cache=False, max_workers=2, use_gpu=False)
+    # Without preprocessing the raw file bytes are sent, so the handler can tell the images apart
+    out = ocr.process_batch([str(good), str(failing), str(bad), str(missing)], preprocess=False)
+
+    assert out["results"] == {str(good): "hello", str(bad): "hello"}
+    assert set(out["errors"]) == {str(failing), str(missing)}
+    assert out["statistics"] == {"total": 4, "successful": 2, "failed": 2}
+
+    # With preprocessing the undecodable image fails before any request is made
+    out = ocr.process_batch([str(good), str(bad)], preprocess=True)
+    assert out["results"] == {str(good): "hello"}
+    assert "Could not read image" in out["errors"][str(bad)]
+    assert out["statistics"] == {"total": 2, "successful": 1, "failed": 1}
+
+
+class _FakeResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"response": "hello"}
+
+
+class _FakeSession:
+    def __init__(self):
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        self.calls += 1
+        return _FakeResponse()
+
+
+def test_process_image_serves_repeats_from_cache(tmp_path):
+    image = _write_png(tmp_path / "image.png", 0)
+    ocr = OCRProcessor(cache_path=str(tmp_path / "cache.sqlite"), use_gpu=False)
+    ocr.session = session = _FakeSession()
+
+    assert ocr.process_image(str(image), format_type="text") == "hello"
+    assert ocr.process_image(str(image), format_type="text") == "hello"
+    # The same bytes from memory share the file's cache entry
+    assert ocr.process_image(image.read_bytes(), format_type="text") == "hello"
+    assert session.calls == 1
+
+    # A different format or preprocessing path is a separate entry
+    ocr.process_image(str(image), format_type="markdown")
+    assert session.calls == 2
+    ocr.process_image(str(image), format_type="text", preprocess=False)
+    assert session.calls == 3
+
+
+def test_cache_errors_fall_back_to_ollama(tmp_path):
+    image = _write_png(tmp_path / "image.png", 0)
+    cache = str(tmp_path / "cache.sqlite")
+    ocr = OCRProcessor(cache_path=cache, use_gpu=False)
+    ocr.session = session = _FakeSession()
+
+    # Another connection holding the write lock makes lookups and writes fail
+    other = sqlite3.connect(cache, timeout=0)
+    other.execute("BEGIN EXCLUSIVE")
+    ocr._cache.execute("PRAGMA busy_timeout = 0")
+    try:
+        assert ocr.process_image(str(image), format_type="text") == "hello"
+        assert session.calls == 1
+    finally:
+        other.rollback()
+        other.close()
+
+    # An unwritable cache location disables the cache instead of failing
+    ocr = OCRProcessor(cache_path=str(tmp_path / "missing" / "cache.sqlite"), use_gpu=False)
+    ocr.session = session = _FakeSession()
+    assert ocr.process_image(str(image), format_type="text") == "hello"
+    assert session.calls == 1
+
+
+def test_warm_up_sends_one_load_request(tmp_path, monkeypatch):
+    posted = []
+    monkeypatch.setattr(
+        ocr_processor.requests.Session, "post",
+        lambda self, url, data=None, **kwargs: posted.append(json.loads(data))
+    )
+    OCRProcessor(model_name="m", enable_cache=False, keep_alive=-1, warm_up=True)
+    assert posted == [{"model": "m", "prompt": "", "keep_alive": -1}]
+
+
+def test_preprocess_skips_enhancement_for_clean_images():
+    ocr = OCRProcessor(enable_cache=False, use_gpu=False)
+    rng = np.random.default_rng(0)
+
+    # High contrast and sharp, like black print on white: returned as plain grayscale
+    blocks = rng.choice(np.array([0, 255], np.uint8), (150, 200))
+    clean = cv2.cvtColor(cv2.resize(blocks, (2000, 1500), interpolation=cv2.INTER_NEAREST), cv2.COLOR_GRAY2BGR)
+    _, data = cv2.imencode(".png", clean)
+    out = ocr._preprocess_image(data.tobytes())
+    assert np.array_equal(out, cv2.cvtColor(clean, cv2.COLOR_BGR2GRAY))
+
+    # Low contrast: goes through CLAHE and denoise
+    faded = rng.integers(120, 130, (1500, 2000, 3), dtype=np.uint8)
+    _, data = cv2.imencode(".png", faded)
+    out = ocr._preprocess_image(data.tobytes())
+    expected = clahe_denoise(cv2.cvtColor(faded, cv2.COLOR_BGR2GRAY), np.empty(out.shape, np.uint8))
+    assert np.array_equal(out, expected)
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ollama_ocr import preproc  # noqa: E402
+
+# Includes sizes that aren't a multiple of the 8x8 tile grid, which OpenCV pads
+SHAPES = [(64, 64), (100, 130), (37, 53), (300, 401), (5, 3), (1, 1)]
+
+
+def _images(shape):
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 256, shape, dtype=np.uint8)
+    return {
+        "constant": np.full(shape, 200, np.uint8),
+        "noise": noise,
+        "smooth": cv2.GaussianBlur(noise, (0, 0), 3),
+    }
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_clahe_denoise_matches_opencv(shape):
+    bufs = preproc.allocate_buffers(shape)
+    for name, gray in _images(shape).items():
+        expected = cv2.GaussianBlur(
+            cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray),
+            (5, 5), 0, borderType=cv2.BORDER_REPLICATE
+        )
+        # Reused buffers must not carry anything over from the previous image
+        assert preproc.clahe_denoise(gray, bufs["out"]) is bufs["out"]
+        assert np.array_equal(bufs["out"], expected), name
+
+
+def test_clahe_denoise_writes_out():
+    gray = _images((100, 130))["constant"]
+    out = np.empty(gray.shape, np.uint8)
+    assert preproc.clahe_denoise(gray, out) is out
+    assert (out == 233).all()